@@ -1,3 +1,4 @@
+import functools
 import logging
 from logging.handlers import TimedRotatingFileHandler
 import os
@@ -9,7 +10,9 @@ LOG_ROTATION = "midnight"
 timestamp = datetime.today().strftime('%Y-%m-%d')
 
 
+@functools.lru_cache(maxsize=None)
 def configure_logger(name):  # pragma: no cover
+    # Cached so that each named logger is configured, and gets its handlers, only once
     log_level = os.getenv("APP_LOG_LEVEL", "WARNING")
     log_dir = os.getenv("LOG_DIR", "logs/")
     # create log directory if it doesn't exist
@@ -1,18 +1,62 @@
 import datetime
+import os
+import re
+import struct
 from jp2_remediator import configure_logger
 from jpylyzer import boxvalidator
 
 from jp2_remediator.jp2_result import Jp2Result
 
+# Big-endian unsigned 32-bit integer, the encoding of the ICC tag and curv fields
+_U32BE = struct.Struct(">I")
+
+# jpylyzer BoxValidator options, shared by every reader
+VALIDATOR_OPTIONS = {
+    "validationFormat": "jp2",
+    "verboseFlag": True,
+    "nullxmlFlag": False,
+    "packetmarkersFlag": False,
+}
+
+TRC_TAGS = {
+    b"\x72\x54\x52\x43": "rTRC",  # search hex for 'rTRC'
+    b"\x67\x54\x52\x43": "gTRC",  # search hex for 'gTRC'
+    b"\x62\x54\x52\x43": "bTRC",  # search hex for 'bTRC'
+}
+
+# Matches the 'rTRC', 'gTRC' and 'bTRC' tag signatures in a single scan
+TRC_TAG_PATTERN = re.compile(b"[rgb]TRC")
+
+
+def _find_trc_positions(file_contents, start=0):
+    # Finds the first position of each TRC tag signature at or after start.
+    # Returns a dict of positions keyed by tag signature, stops once all tags are found.
+    trc_positions = {}
+    for match in TRC_TAG_PATTERN.finditer(file_contents, start):
+        trc_positions.setdefault(match.group(), match.start())
+        if len(trc_positions) == len(TRC_TAGS):
+            break
+    return trc_positions
+
 
 class BoxReader:
-    def __init__(self, file_path):
+    def __init__(self, file_path, validate=True):
         # Initializes BoxReader with a file path.
+        # If validate is False, jpylyzer validation is skipped and the result validity is None.
+        self.validate = validate
+        self.logger = configure_logger(__name__)
+        self.reset(file_path)
+
+    def reset(self, file_path):
+        # Resets the reader to process another file, keeping its configuration and logger.
         self.file_path = file_path
         self.file_contents = self.read_file(file_path)
+        self.clear_state()
+
+    def clear_state(self):
+        # Clears the validator and TRC values left by the previous file.
         self.validator = None
         self.curv_trc_gamma_n = None
-        self.logger = configure_logger(__name__)
 
     def read_file(self, file_path):
         # Reads the file content from the given path.
@@ -25,13 +69,7 @@ class BoxReader:
 
     def initialize_validator(self):
         # Initializes the jpylyzer BoxValidator for JP2 file validation.
-        options = {
-            "validationFormat": "jp2",
-            "verboseFlag": True,
-            "nullxmlFlag": False,
-            "packetmarkersFlag": False,
-        }
-        self.validator = boxvalidator.BoxValidator(options, "JP2", self.file_contents)
+        self.validator = boxvalidator.BoxValidator(VALIDATOR_OPTIONS, "JP2", self.file_contents)
         self.validator.validate()
         return self.validator
 
@@ -87,26 +125,27 @@ class BoxReader:
 
         return header_offset_position
 
-    def process_trc_tag(self, trc_hex, trc_name, new_contents, header_offset_position):
+    def process_trc_tag(self, trc_hex, trc_name, new_contents, header_offset_position, trc_position=None):
         # Processes the TRC tag and modifies contents if necessary.
-        trc_position = new_contents.find(trc_hex)
+        # trc_position is searched for from the ICC profile in new_contents if it is not given,
+        # as in process_all_trc_tags.
+        if trc_position is None:
+            trc_position = new_contents.find(trc_hex, header_offset_position or 0)
         if trc_position == -1:
             self.logger.debug(f"'{trc_name}' not found in the file.")
             return new_contents
 
         self.logger.debug(f"'{trc_name}' found at byte position: {trc_position}")
-        trc_tag_entry = new_contents[trc_position:trc_position + 12]
-        # 12-byte tag entry length
-
-        if len(trc_tag_entry) != 12:
+        # 12-byte tag entry length, fields are read in place without slicing
+        if trc_position + 12 > len(new_contents):
             self.logger.debug(f"Could not extract the full 12-byte '{trc_name}' tag entry.")
             return new_contents
 
-        trc_tag_signature = trc_tag_entry[0:4]
+        trc_tag_signature = bytes(new_contents[trc_position:trc_position + 4])
         # ICC.1:2022 Table 24 tag signature, e.g. 'rTRC'
-        trc_tag_offset = int.from_bytes(trc_tag_entry[4:8], byteorder='big')
+        trc_tag_offset = _U32BE.unpack_from(new_contents, trc_position + 4)[0]
         # ICC.1:2022 Table 24 tag offset
-        trc_tag_size = int.from_bytes(trc_tag_entry[8:12], byteorder='big')
+        trc_tag_size = _U32BE.unpack_from(new_contents, trc_position + 8)[0]
         # ICC.1:2022 Table 24 tag size
         self.logger.debug(f"'{trc_name}' Tag Signature: {trc_tag_signature}")
         self.logger.debug(f"'{trc_name}' Tag Offset: {trc_tag_offset}")
@@ -117,15 +156,17 @@ class BoxReader:
             return new_contents
 
         curv_trc_position = trc_tag_offset + header_offset_position  # start of curv profile data
-        curv_profile = new_contents[curv_trc_position: curv_trc_position + 12]  # 12-byte curv profile data length
-
-        if len(curv_profile) < 12:
+        # 12-byte curv profile data length
+        if curv_trc_position + 12 > len(new_contents):
             self.logger.debug(f"Could not read the full 'curv' profile data for {trc_name}.")
             return new_contents
 
-        curv_signature = curv_profile[0:4].decode("utf-8")  # ICC.1:2022 Table 35 tag signature
-        curv_reserved = int.from_bytes(curv_profile[4:8], byteorder="big")  # ICC.1:2022 Table 35 reserved 0's
-        curv_trc_gamma_n = int.from_bytes(curv_profile[8:12], byteorder="big")  # ICC.1:2022 Table 35 n value
+        # ICC.1:2022 Table 35 tag signature
+        curv_signature = bytes(new_contents[curv_trc_position:curv_trc_position + 4]).decode("utf-8")
+        # ICC.1:2022 Table 35 reserved 0's
+        curv_reserved = _U32BE.unpack_from(new_contents, curv_trc_position + 4)[0]
+        # ICC.1:2022 Table 35 n value
+        curv_trc_gamma_n = _U32BE.unpack_from(new_contents, curv_trc_position + 8)[0]
 
         self.logger.debug(f"'curv' Profile Signature for {trc_name}: {curv_signature}")
         self.logger.debug(f"'curv' Reserved Value: {curv_reserved}")
@@ -144,21 +185,31 @@ class BoxReader:
         if trc_tag_size != curv_trc_field_length:
             self.logger.warning(f"""'{trc_name}' Tag Size ({trc_tag_size}) does not match 'curv_{
                 trc_name}_field_length' ({curv_trc_field_length}). Modifying the size...""")
-            new_trc_size_bytes = curv_trc_field_length.to_bytes(4, byteorder='big')
-            new_contents[trc_position + 8: trc_position + 12] = new_trc_size_bytes
+            if new_contents is self.file_contents or not isinstance(new_contents, bytearray):
+                # Copy the file contents only once a change is needed, the caller's buffer is never modified
+                new_contents = bytearray(new_contents)
+            _U32BE.pack_into(new_contents, trc_position + 8, curv_trc_field_length)
         return new_contents
 
     def process_all_trc_tags(self, header_offset_position):
         # Function to process 'TRC' tags (rTRC, gTRC, bTRC).
-        new_file_contents = bytearray(self.file_contents)
-        trc_tags = {
-            b"\x72\x54\x52\x43": "rTRC",  # search hex for 'rTRC'
-            b"\x67\x54\x52\x43": "gTRC",  # search hex for 'gTRC'
-            b"\x62\x54\x52\x43": "bTRC",  # search hex for 'bTRC'
-        }
+        # Returns the file contents themselves if no tag needed modifying.
+        new_file_contents = self.file_contents
+        # The tag table is part of the ICC profile, so the scan starts at the profile.
+        start = header_offset_position or 0
+
+        # A plain substring search rules out files without any TRC tag before scanning for each tag
+        if new_file_contents.find(b"TRC", start) == -1:
+            self.logger.debug("No 'TRC' tags found in the file.")
+            return new_file_contents
 
-        for trc_hex, trc_name in trc_tags.items():
-            new_file_contents = self.process_trc_tag(trc_hex, trc_name, new_file_contents, header_offset_position)
+        # Find the first position of every tag in one pass over the contents.
+        trc_positions = _find_trc_positions(new_file_contents, start)
+
+        for trc_hex, trc_name in TRC_TAGS.items():
+            new_file_contents = self.process_trc_tag(
+                trc_hex, trc_name, new_file_contents, header_offset_position, trc_positions.get(trc_hex, -1)
+            )
 
         return new_file_contents
 
@@ -167,7 +218,8 @@ class BoxReader:
         # Returns the new file path or None if no changes were made.
         if new_file_contents != self.file_contents:
             timestamp = datetime.datetime.now().strftime("%Y%m%d")  # use "%Y%m%d_%H%M%S" for more precision
-            new_file_path = self.file_path.replace(".jp2", f"_modified_{timestamp}.jp2")
+            root, _ = os.path.splitext(self.file_path)
+            new_file_path = f"{root}_modified_{timestamp}.jp2"
             with open(new_file_path, "wb") as new_file:
                 new_file.write(new_file_contents)
             self.logger.info(f"New JP2 file created with modifications: {new_file_path}")
@@ -176,23 +228,36 @@ class BoxReader:
             self.logger.info(f"No modifications needed. No new file created: {self.file_path}")
             return None
 
-    def read_jp2_file(self):
-        # Main function to read, validate, and check to remediate JP2 files.
-        # Returns result object with the modified file_path and remediation status
+    def remediate_jp2(self):
+        # Validates and checks to remediate the JP2 file contents in memory.
+        # Returns result object and the (possibly modified) file contents
         result = Jp2Result(self.file_path)
         if not self.file_contents:
-            return result.empty_result()
+            return result.empty_result(), self.file_contents
 
-        self.initialize_validator()
-        is_valid = self.validator._isValid()
-        self.logger.info(f"Is file valid? {is_valid}")
-        result.set_validity(is_valid)
+        if self.validate:
+            self.initialize_validator()
+            is_valid = self.validator._isValid()
+            self.logger.info(f"Is file valid? {is_valid}")
+            result.set_validity(is_valid)
+        else:
+            result.set_validity(None)
 
         header_offset_position = self.check_boxes()
         new_file_contents = self.process_all_trc_tags(header_offset_position)
 
-        # If any TRC had a curv_trc_gamma_n != 1, skip writing the modified file.
+        # If any TRC had a curv_trc_gamma_n != 1, remediation is skipped by the caller.
         result.set_skip_remediation(self.curv_trc_gamma_n)
+        return result, new_file_contents
+
+    def read_jp2_file(self):
+        # Main function to read, validate, and check to remediate JP2 files.
+        # Returns result object with the modified file_path and remediation status
+        result, new_file_contents = self.remediate_jp2()
+        if result.is_empty:
+            return result
+
+        # If any TRC had a curv_trc_gamma_n != 1, skip writing the modified file.
         if not self._skip_remediation():
             modified_path = self.write_modified_file(new_file_contents)
             result.set_modified_file_path(modified_path)
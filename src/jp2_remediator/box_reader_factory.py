@@ -1,12 +1,28 @@
 from jp2_remediator.box_reader import BoxReader
+from jp2_remediator.in_memory_box_reader import InMemoryBoxReader
 
 
 class BoxReaderFactory:
 
+    def __init__(self, validate=True):
+        """
+        :param validate: Whether readers validate files with jpylyzer.
+        """
+        self.validate = validate
+
     def get_reader(self, file_path):
         """
         Create a BoxReader instance for a given file path.
         :param file_path: The path to the file to be read.
         :return: A BoxReader instance.
         """
-        return BoxReader(file_path)
+        return BoxReader(file_path, validate=self.validate)
+
+    def get_in_memory_reader(self, image_bytes, file_path=None):
+        """
+        Create an InMemoryBoxReader instance for the bytes of a JP2 file.
+        :param image_bytes: The contents of the JP2 file.
+        :param file_path: The path or key identifying the file in logs and results.
+        :return: An InMemoryBoxReader instance.
+        """
+        return InMemoryBoxReader(image_bytes, file_path, validate=self.validate)
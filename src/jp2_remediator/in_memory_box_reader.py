@@ -0,0 +1,23 @@
+from jp2_remediator import configure_logger
+from jp2_remediator.box_reader import BoxReader
+
+
+class InMemoryBoxReader(BoxReader):
+    def __init__(self, image_bytes, file_path=None, validate=True):
+        # Initializes InMemoryBoxReader with the bytes of a JP2 file.
+        # file_path only identifies the image in logs and results, nothing is read from or written to disk.
+        self.validate = validate
+        self.logger = configure_logger(__name__)
+        self.reset(image_bytes, file_path)
+
+    def reset(self, image_bytes, file_path=None):
+        # Resets the reader to process another image.
+        self.file_path = file_path
+        self.file_contents = image_bytes
+        self.clear_state()
+
+    def read_jp2_file(self):
+        # Validates and checks to remediate the image without writing a modified file.
+        # Returns result object, the modified contents are returned by remediate_jp2.
+        result, _ = self.remediate_jp2()
+        return result
@@ -3,7 +3,8 @@ class Jp2Result:
     Represents the result of processing a JP2 file.
     - path: The path to the JP2 file.
     - is_empty: True if the JP2 file is empty, False otherwise.
-    - is_valid: True if the JP2 file is valid per Jpylyzer, False otherwise.
+    - is_valid: True if the JP2 file is valid per Jpylyzer, False otherwise,
+      None if the file was not validated (preflight skip, or validation turned off).
     - curv_trc_gamma_n: The value of the curv, trc, or gamma box n parameter.
     - modified_file_path: The path to the modified JP2 file.
 
@@ -47,7 +48,7 @@ class Jp2Result:
     def result_code(self):
         if self.is_empty:
             return 1  # failure, empty jp2
-        elif not self.is_valid:
+        elif self.is_valid is not None and not self.is_valid:
             return 2  # failure, invalid jp2
         elif self.is_skip_remediation():
             return 3  # failure, skipped remediation, unexpected curv_trc_gamma_n
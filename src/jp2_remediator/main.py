@@ -5,9 +5,11 @@ from jp2_remediator.processor import Processor
 
 def main():
     """Main entry point for the JP2 file processor."""
-    processor = Processor(BoxReaderFactory())
-
     parser = argparse.ArgumentParser(description="JP2 file processor")
+    parser.add_argument(
+        "--skip-validation", action="store_true",
+        help="Skip jpylyzer validation, only check and remediate the TRC tags"
+    )
 
     # Create mutually exclusive subparsers for specifying input source
     subparsers = parser.add_subparsers(
@@ -59,6 +61,7 @@ def main():
     )
 
     args = parser.parse_args()
+    processor = Processor(BoxReaderFactory(validate=not args.skip_validation))
 
     if hasattr(args, "func"):
         # Returns Jp2Result object
@@ -1,16 +1,107 @@
+import datetime
+import multiprocessing
 import os
+import posixpath
+import queue
 import shutil
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from jp2_remediator import configure_logger
+from jp2_remediator.jp2_result import Jp2Result
+
+# Number of threads used to scan subdirectories concurrently
+SCAN_MAX_WORKERS = 32
+
+# Number of bytes fetched from the start of an S3 object by preflight_skip,
+# enough to hold the JP2 header boxes and ICC profile
+PREFLIGHT_RANGE_BYTES = 65536
+
+MIB = 1024 * 1024
+
+# Multipart settings for S3 transfers of files on disk, using 16 MiB parts.
+# Used for downloads, whose size is not known up front, and for large uploads.
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MIB,
+    multipart_chunksize=16 * MIB,
+    max_concurrency=10,
+)
+# Files below the multipart threshold are sent in a single request, without extra threads
+SMALL_TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * MIB, use_threads=False)
+# Files of a few parts gain little from more than a few concurrent parts
+MEDIUM_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MIB,
+    multipart_chunksize=16 * MIB,
+    max_concurrency=4,
+)
+
+# Messages passed from directory scans to _iter_jp2_paths
+_FOUND_FILE = "file"
+_FOUND_DIRECTORY = "directory"
+_SCAN_DONE = "done"
+
+
+def _modified_output_key(input_key, timestamp):
+    """Return the key of the modified copy of input_key, under the same prefix."""
+    root, _ = posixpath.splitext(input_key)
+    return f"{root}_modified_file_{timestamp}.jp2"
+
+
+def _transfer_config(size):
+    """Return the S3 transfer settings for a file of size bytes."""
+    if size < 8 * MIB:
+        # s3transfer uses multipart from multipart_threshold bytes up
+        return SMALL_TRANSFER_CONFIG
+    if size <= 64 * MIB:
+        return MEDIUM_TRANSFER_CONFIG
+    return TRANSFER_CONFIG
+
+
+def _worker_context():
+    """Return the multiprocessing context used to start process_directory workers.
+       Forking this process while the scan threads of _iter_jp2_paths are running
+       is unsafe, so workers come from a fork server, or are spawned where there is none.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+# Factory and reader of the current worker process, see _init_worker
+_worker_factory = None
+_worker_reader = None
+
+
+def _init_worker(factory):
+    """Set up a worker process of process_directory with the factory for its reader."""
+    global _worker_factory, _worker_reader
+    _worker_factory = factory
+    _worker_reader = None
+
+
+def _process_one(file_path):
+    """Process a single JP2 file in a worker process, reusing the worker's reader."""
+    global _worker_reader
+    if _worker_reader is None:
+        _worker_reader = _worker_factory.get_reader(file_path)
+    else:
+        _worker_reader.reset(file_path)
+    return _worker_reader.read_jp2_file()
 
 
 class Processor:
     """Class to process JP2 files."""
 
-    def __init__(self, factory):
-        """Initialize the Processor with a BoxReader factory."""
+    def __init__(self, factory, max_workers=None):
+        """Initialize the Processor with a BoxReader factory.
+           max_workers is the number of processes used by process_directory,
+           defaults to the number of CPUs; 1 processes files sequentially.
+        """
         self.box_reader_factory = factory
+        self.max_workers = max_workers
         self.logger = configure_logger(__name__)
 
     def process_file(self, file_path):
@@ -20,24 +111,146 @@ class Processor:
         return reader.read_jp2_file()
 
     def process_directory(self, directory_path):
-        """Process all JP2 files in a given directory."""
-        for root, _, files in os.walk(directory_path):
-            for file in files:
-                if file.lower().endswith(".jp2"):
-                    file_path = os.path.join(root, file)
-                    self.process_file(file_path)
-
-    def process_s3_file(self, input_bucket, input_key, output_bucket, output_key):
+        """Process all JP2 files in a given directory.
+           Returns a list of result objects, one per JP2 file.
+           Unless max_workers is 1, worker processes import the caller's __main__
+           module, so scripts must call this under an if __name__ == "__main__" guard.
+        """
+        file_paths = self._iter_jp2_paths(directory_path)
+        if self.max_workers == 1:
+            return [self.process_file(file_path) for file_path in file_paths]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=_worker_context(),
+                                 initializer=_init_worker, initargs=(self.box_reader_factory,)) as executor:
+            # map() submits each path as soon as it is found, so processing
+            # starts while the rest of the tree is still being scanned.
+            return list(executor.map(_process_one, self._log_processing(file_paths), chunksize=8))
+
+    def _log_processing(self, file_paths):
+        """Log each file path as it is handed to a worker process."""
+        for file_path in file_paths:
+            self.logger.info(f"Processing file: {file_path}")
+            yield file_path
+
+    def _iter_jp2_paths(self, directory_path):
+        """Yield the paths of all JP2 files under a directory.
+           Each subdirectory is scanned by its own task in a thread pool,
+           which hides stat/readdir latency on network filesystems.
+        """
+        found = queue.Queue()
+        with ThreadPoolExecutor(max_workers=SCAN_MAX_WORKERS) as executor:
+            executor.submit(self._scan_directory, directory_path, found)
+            pending_scans = 1
+            while pending_scans:
+                kind, path = found.get()
+                if kind == _FOUND_FILE:
+                    yield path
+                elif kind == _FOUND_DIRECTORY:
+                    executor.submit(self._scan_directory, path, found)
+                    pending_scans += 1
+                else:
+                    pending_scans -= 1
+
+    def _scan_directory(self, directory_path, found):
+        """Report the JP2 files and subdirectories of one directory to the found queue."""
+        try:
+            with os.scandir(directory_path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        found.put((_FOUND_DIRECTORY, entry.path))
+                    elif entry.name.lower().endswith(".jp2") and entry.is_file():
+                        found.put((_FOUND_FILE, entry.path))
+        except OSError as e:
+            self.logger.error(f"Error scanning directory {directory_path}: {e}")
+        finally:
+            found.put((_SCAN_DONE, directory_path))
+
+    def process_s3_file(self, input_bucket, input_key, output_bucket, output_key,
+                        use_memory=True, s3_client=None, timestamp=None):
         """Process a specific JP2 file from S3 and upload to a specified S3 location.
+           If output_key is None, the modified file is named after input_key
+           and timestamp (default: today's date).
+           The file is processed in memory unless use_memory is False,
+           in which case it is downloaded to a temporary directory.
+           s3_client is reused if given, otherwise a new client is created.
            Returns result object with output_key and remediation status.
         """
-        s3 = boto3.client("s3")
+        s3 = s3_client or boto3.client("s3")
+        if output_key is None:
+            timestamp = timestamp or datetime.datetime.now().strftime("%Y%m%d")
+            output_key = _modified_output_key(input_key, timestamp)
+        if use_memory:
+            return self._process_s3_file_in_memory(s3, input_bucket, input_key, output_bucket, output_key)
 
-        # Download the file from S3
         tmp_dir = tempfile.mkdtemp()
-        download_path = f"/{tmp_dir}/{os.path.basename(input_key)}"
+        try:
+            return self._process_s3_file_on_disk(s3, input_bucket, input_key, output_bucket, output_key, tmp_dir)
+        finally:
+            # Delete the downloaded file and anything else left in the temporary directory
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self.logger.debug(f"Deleted temporary directory: {tmp_dir}")
+
+    def process_s3_batch(self, input_bucket, keys, output_bucket, max_concurrency=16):
+        """Process several JP2 files from S3 concurrently with a shared S3 client.
+           Modified files are uploaded to output_bucket, named after their input keys.
+           Returns a dict of result objects by input key; keys that failed are logged and omitted.
+        """
+        s3 = self._batch_s3_client(max_concurrency)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {
+                executor.submit(
+                    self.process_s3_file, input_bucket, key, output_bucket, None, s3_client=s3, timestamp=timestamp
+                ): key
+                for key in keys
+            }
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                    self.logger.info(f"Processed {key}: {results[key]}")
+                except Exception as e:
+                    self.logger.error(f"Error processing {key} from bucket {input_bucket}: {e}")
+        return results
+
+    def _batch_s3_client(self, max_concurrency):
+        """Create one S3 client, shared by every thread of a batch."""
+        session = boto3.session.Session()
+        return session.client("s3", config=Config(max_pool_connections=max_concurrency))
+
+    def preflight_skip(self, input_bucket, input_key, s3_client=None):
+        """Check the TRC tags at the start of a JP2 file in S3 without downloading all of it.
+           Returns a tuple (should_skip, curv_trc_gamma_n). should_skip is False
+           if the gamma value could not be read from the fetched range, or if the
+           object is empty. Only TRC curves within the first PREFLIGHT_RANGE_BYTES
+           are seen, so a curve past the range does not take part in the decision.
+        """
+        s3 = s3_client or boto3.client("s3")
+        try:
+            response = s3.get_object(
+                Bucket=input_bucket, Key=input_key, Range=f"bytes=0-{PREFLIGHT_RANGE_BYTES - 1}"
+            )
+        except ClientError as e:
+            # S3 rejects any range on an empty object, leave it to the full download
+            if e.response.get("Error", {}).get("Code") != "InvalidRange":
+                raise
+            self.logger.debug(f"Range not satisfiable for {input_key}, skipping preflight check")
+            return False, None
+        reader = self.box_reader_factory.get_in_memory_reader(response["Body"].read(), input_key)
+        header_offset_position = reader.check_boxes()
+        reader.process_all_trc_tags(header_offset_position)
+
+        curv_trc_gamma_n = reader.curv_trc_gamma_n
+        return curv_trc_gamma_n is not None and curv_trc_gamma_n != 1, curv_trc_gamma_n
+
+    def _process_s3_file_on_disk(self, s3, input_bucket, input_key, output_bucket, output_key, tmp_dir):
+        """Process a JP2 file from S3 by downloading it to tmp_dir."""
+        # Download the file from S3
+        download_path = os.path.join(tmp_dir, os.path.basename(input_key))
         self.logger.info(f"Downloading file: {input_key} from bucket: {input_bucket}")
-        s3.download_file(input_bucket, input_key, download_path)
+        s3.download_file(input_bucket, input_key, download_path, Config=TRANSFER_CONFIG)
 
         # Process the file
         reader = self.box_reader_factory.get_reader(download_path)
@@ -48,16 +261,15 @@ class Processor:
             return result
 
         modified_file_path = result.get_modified_file_path()
-        if os.path.exists(modified_file_path):
+        if modified_file_path and os.path.exists(modified_file_path):
             self.logger.info(f"Uploading modified file to bucket: {output_bucket}, key: {output_key}")
-            s3.upload_file(modified_file_path, output_bucket, output_key)
+            transfer_config = _transfer_config(os.path.getsize(modified_file_path))
+            s3.upload_file(modified_file_path, output_bucket, output_key, Config=transfer_config)
 
             # Delete the temporary file after successful upload
             try:
                 os.remove(modified_file_path)
                 self.logger.debug(f"Deleted temporary file: {modified_file_path}")
-                shutil.rmtree(tmp_dir)
-                self.logger.debug(f"Deleted temporary directory: {tmp_dir}")
             except OSError as e:
                 self.logger.error(f"Error deleting file {modified_file_path}: {e}")
         # In case the modified file was not created, log a message for debugging
@@ -65,3 +277,33 @@ class Processor:
             self.logger.info(f"File {modified_file_path} not created.")
 
         return result
+
+    def _process_s3_file_in_memory(self, s3, input_bucket, input_key, output_bucket, output_key):
+        """Process a JP2 file from S3 without writing it to local disk."""
+        should_skip, curv_trc_gamma_n = self.preflight_skip(input_bucket, input_key, s3)
+        if should_skip:
+            # The file is not validated, only its header has been fetched
+            result = Jp2Result(input_key)
+            result.set_validity(None)
+            result.set_skip_remediation(curv_trc_gamma_n)
+            self.logger.info(f"Skipping remediation and download for {result}.")
+            return result
+
+        self.logger.info(f"Downloading file: {input_key} from bucket: {input_bucket}")
+        image_bytes = s3.get_object(Bucket=input_bucket, Key=input_key)["Body"].read()
+
+        reader = self.box_reader_factory.get_in_memory_reader(image_bytes, input_key)
+        result, new_file_contents = reader.remediate_jp2()
+
+        if result.is_skip_remediation():
+            self.logger.info(f"Skipping remediation and upload for {result}.")
+            return result
+
+        if result.is_empty or new_file_contents == image_bytes:
+            self.logger.info(f"No modifications needed. No file uploaded: {input_key}")
+            return result
+
+        self.logger.info(f"Uploading modified file to bucket: {output_bucket}, key: {output_key}")
+        s3.put_object(Bucket=output_bucket, Key=output_key, Body=new_file_contents)
+        result.set_modified_file_path(output_key)
+        return result
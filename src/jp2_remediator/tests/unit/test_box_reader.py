@@ -137,6 +137,37 @@ class TestJP2ProcessingWithFile(unittest.TestCase):
         )
         self.assertEqual(modified_contents, self.reader.file_contents)
 
+    # Test for process_all_trc_tags method finding the first position of each tag
+    def test_process_all_trc_tags_positions(self):
+        self.reader.file_contents = (b"\x00" * 10 + b"bTRC" + b"\x00" * 10 + b"rTRC"
+                                     + b"\x00" * 10 + b"rTRC" + b"\x00" * 10)
+        header_offset_position = 5
+        with patch.object(self.reader, 'process_trc_tag', side_effect=lambda *args: args[2]) as mock_process_trc_tag:
+            self.reader.process_all_trc_tags(header_offset_position)
+
+        positions = {call.args[1]: call.args[4] for call in mock_process_trc_tag.call_args_list}
+        self.assertEqual(positions, {"rTRC": 24, "gTRC": -1, "bTRC": 10})
+
+    # Test for process_all_trc_tags method ignoring tags before the ICC profile
+    def test_process_all_trc_tags_ignores_tags_before_profile(self):
+        self.reader.file_contents = b"gTRC" + b"\x00" * 20 + b"rTRC" + b"\x00" * 20
+        with patch.object(self.reader, 'process_trc_tag', side_effect=lambda *args: args[2]) as mock_process_trc_tag:
+            self.reader.process_all_trc_tags(10)
+
+        positions = {call.args[1]: call.args[4] for call in mock_process_trc_tag.call_args_list}
+        self.assertEqual(positions, {"rTRC": 24, "gTRC": -1, "bTRC": -1})
+
+    # Test for process_all_trc_tags method when there is no TRC tag at all
+    def test_process_all_trc_tags_no_trc(self):
+        self.reader.file_contents = b"\x00" * 100
+        with patch.object(self.reader, 'process_trc_tag') as mock_process_trc_tag:
+            modified_contents = self.reader.process_all_trc_tags(50)
+
+        mock_process_trc_tag.assert_not_called()
+        self.assertIs(modified_contents, self.reader.file_contents)
+        self.assertIsNone(self.reader.curv_trc_gamma_n)
+        self.reader.logger.debug.assert_any_call("No 'TRC' tags found in the file.")
+
     # Test for check_boxes method logging when 'jp2h' not found
     def test_jp2h_not_found_logging(self):
         # Set up file_contents to simulate a missing 'jp2h' box
@@ -246,6 +277,16 @@ class TestJP2ProcessingWithFile(unittest.TestCase):
         # Verify that the correct debug message was logged
         self.reader.logger.debug.assert_any_call(f"'{trc_name}' not found in the file.")
 
+    # Test for process_trc_tag: a tag before the ICC profile is not searched for
+    def test_process_trc_tag_ignores_tag_before_profile(self):
+        trc_hex = b"\x72\x54\x52\x43"  # Hex for 'rTRC'
+        new_contents = bytearray(trc_hex + b"\x00" * 100)
+
+        result = self.reader.process_trc_tag(trc_hex, "rTRC", new_contents, 50)
+
+        self.assertIs(result, new_contents)
+        self.reader.logger.debug.assert_any_call("'rTRC' not found in the file.")
+
     # Test for process_trc_tag: header_offset_position is None
     def test_process_trc_tag_header_offset_none(self):
         # Prepare the test data where header_offset_position is None
@@ -307,6 +348,20 @@ class TestJP2ProcessingWithFile(unittest.TestCase):
             # Assert that write_modified_file was called with the modified contents
             mock_write_modified_file.assert_called_once_with(b"Modified JP2 content")
 
+    # Test for read_jp2_file method when validation is turned off
+    def test_read_jp2_file_without_validation(self):
+        reader = BoxReader(TEST_DATA_PATH, validate=False)
+        reader.logger = MagicMock()
+
+        with patch.object(reader, 'initialize_validator') as mock_initialize_validator:
+            result = reader.read_jp2_file()
+
+        mock_initialize_validator.assert_not_called()
+        self.assertIsNone(result.is_valid)
+        self.assertFalse(result.is_empty)
+        # sample.jp2 has curv_trc_gamma_n == 2
+        self.assertEqual(result.result_code(), 3)
+
     # Test for read_jp2_file method when file_contents is None or empty
     def test_read_jp2_file_no_file_contents(self):
         # Set file_contents to None to simulate missing content
@@ -384,6 +439,26 @@ class TestJP2ProcessingWithFile(unittest.TestCase):
             curv_trc_field_length}). Modifying the size..."""
         self.reader.logger.warning.assert_any_call(expected_warning)
 
+    # Test for process_trc_tag: read-only contents are copied before the tag size is modified
+    def test_process_trc_tag_size_mismatch_copies_bytes(self):
+        trc_hex = b"\x72\x54\x52\x43"  # Hex for 'rTRC'
+        curv_profile = b"curv" + (0).to_bytes(4, 'big') + (1).to_bytes(4, 'big')  # gamma_n = 1
+        original_contents = (trc_hex + (20).to_bytes(4, 'big') + (20).to_bytes(4, 'big')
+                             + b"\x00" * 8 + curv_profile)
+        header_offset_position = 0
+
+        result_contents = self.reader.process_trc_tag(trc_hex, "rTRC", original_contents, header_offset_position)
+
+        self.assertIsInstance(result_contents, bytearray)
+        self.assertEqual(int.from_bytes(result_contents[8:12], 'big'), 14)
+        self.assertEqual(int.from_bytes(original_contents[8:12], 'big'), 20)
+
+    # Test for process_all_trc_tags method when no tag needs modifying
+    def test_process_all_trc_tags_no_changes_no_copy(self):
+        self.reader.file_contents = b"\x00" * 50 + b"\x72\x54\x52\x43" + b"\x00" * 50
+        modified_contents = self.reader.process_all_trc_tags(50)
+        self.assertIs(modified_contents, self.reader.file_contents)
+
     # Test for process_trc_tag: when curv_trc_gamma_n != 1, in this case is 2
     def test_process_trc_tag_sets_skip_remediation(self):
         """
@@ -0,0 +1,82 @@
+import os
+from unittest.mock import MagicMock
+from jp2_remediator.in_memory_box_reader import InMemoryBoxReader
+from project_paths import paths
+
+# Define the path to the test data file
+TEST_DATA_PATH = os.path.join(paths.dir_unit_resources, "sample.jp2")
+
+
+class TestInMemoryBoxReader:
+
+    def test_remediate_jp2(self):
+        with open(TEST_DATA_PATH, "rb") as file:
+            image_bytes = file.read()
+        reader = InMemoryBoxReader(image_bytes, "sample.jp2")
+        reader.logger = MagicMock()
+
+        result, new_file_contents = reader.remediate_jp2()
+
+        assert result.path == "sample.jp2"
+        assert result.is_valid is True
+        # sample.jp2 has curv_trc_gamma_n == 2, so it is left unmodified
+        assert result.is_skip_remediation()
+        assert new_file_contents == image_bytes
+
+    def test_remediate_jp2_bytearray_left_unchanged(self):
+        # 'colr' with meth 2, followed by an ICC profile whose rTRC tag size (20)
+        # does not match the 14-byte curv field with curv_trc_gamma_n == 1
+        profile = (b"rTRC" + (12).to_bytes(4, "big") + (20).to_bytes(4, "big")
+                   + b"curv" + (0).to_bytes(4, "big") + (1).to_bytes(4, "big"))
+        image_bytes = bytearray(b"jp2hcolr\x02\x00\x00" + profile)
+        original = bytes(image_bytes)
+        reader = InMemoryBoxReader(image_bytes, "buffer.jp2", validate=False)
+        reader.logger = MagicMock()
+
+        result, new_file_contents = reader.remediate_jp2()
+
+        assert not result.is_skip_remediation()
+        assert image_bytes == original
+        assert new_file_contents is not image_bytes
+        assert int.from_bytes(new_file_contents[19:23], "big") == 14
+
+    def test_remediate_jp2_empty(self):
+        reader = InMemoryBoxReader(b"", "empty.jp2")
+
+        result, new_file_contents = reader.remediate_jp2()
+
+        assert result.is_empty
+        assert result.result_code() == 1
+        assert new_file_contents == b""
+
+    def test_reset(self):
+        reader = InMemoryBoxReader(b"first", "first.jp2")
+        logger = reader.logger
+        reader.curv_trc_gamma_n = 2
+
+        reader.reset(b"second", "second.jp2")
+
+        assert reader.file_contents == b"second"
+        assert reader.file_path == "second.jp2"
+        assert reader.curv_trc_gamma_n is None
+        assert reader.validator is None
+        assert reader.logger is logger
+
+    def test_default_file_path(self):
+        reader = InMemoryBoxReader(b"image")
+
+        assert reader.file_contents == b"image"
+        assert reader.file_path is None
+        assert reader.validate is True
+
+    def test_read_jp2_file(self):
+        with open(TEST_DATA_PATH, "rb") as file:
+            image_bytes = file.read()
+        reader = InMemoryBoxReader(image_bytes, validate=False)
+        reader.logger = MagicMock()
+
+        result = reader.read_jp2_file()
+
+        assert result.path is None
+        assert result.is_skip_remediation()
+        assert result.get_modified_file_path() is None
@@ -24,6 +24,12 @@ class TestJp2Result:
         result.set_skip_remediation(2)
         assert result.result_code() == 3
 
+    def test_result_code_skip_remediation_not_validated(self):
+        result = Jp2Result("test.jp2")
+        result.set_validity(None)
+        result.set_skip_remediation(2)
+        assert result.result_code() == 3
+
     def test_result_code_neutral(self):
         result = Jp2Result("test.jp2")
         result.set_validity(True)
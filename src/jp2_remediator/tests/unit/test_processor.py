@@ -1,21 +1,39 @@
+import os
+import shutil
 import pytest
 from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError
+from project_paths import paths
+from jp2_remediator import processor as _proc_mod
+from jp2_remediator.box_reader_factory import BoxReaderFactory
 from jp2_remediator.jp2_result import Jp2Result
-from jp2_remediator.processor import Processor
+from jp2_remediator.processor import (
+    Processor, MEDIUM_TRANSFER_CONFIG, SMALL_TRANSFER_CONFIG, TRANSFER_CONFIG, _modified_output_key, _transfer_config
+)
 
 
 class TestProcessor:
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def mock_box_reader_factory(self):
         return MagicMock()
 
+    @pytest.fixture(scope="module")
+    def processor(self, mock_box_reader_factory):
+        with patch.object(_proc_mod, "configure_logger", return_value=MagicMock()):
+            return Processor(mock_box_reader_factory)
+
+    @pytest.fixture(autouse=True)
+    def reset_mocks(self, processor, mock_box_reader_factory):
+        # The factory and processor are shared by the whole module, reset their mocks for each test
+        mock_box_reader_factory.reset_mock(return_value=True, side_effect=True)
+        processor.logger.reset_mock()
+
     @pytest.fixture
-    @patch("jp2_remediator.processor.configure_logger")
-    def processor(self, mock_configure_logger, mock_box_reader_factory):
-        mock_logger = MagicMock()
-        mock_configure_logger.return_value = mock_logger
-        return Processor(mock_box_reader_factory)
+    def fake_boto3(self, monkeypatch):
+        fake_boto3 = MagicMock()
+        monkeypatch.setattr(_proc_mod, "boto3", fake_boto3)
+        return fake_boto3
 
     def test_process_file(self, processor, mock_box_reader_factory):
         file_path = "test_file.jp2"
@@ -28,187 +46,329 @@ class TestProcessor:
         mock_box_reader_factory.get_reader.assert_called_once_with(file_path)
         mock_box_reader_factory.get_reader.return_value.read_jp2_file.assert_called_once()
 
-    @patch("os.walk", return_value=[("root", [], ["file1.jp2", "file2.jp2"])])
-    def test_process_directory_with_multiple_files(self, mock_os_walk, processor, mock_box_reader_factory):
-        processor.process_directory("dummy_path")
+    @pytest.fixture
+    def jp2_tree(self, tmp_path):
+        (tmp_path / "nested" / "deeper").mkdir(parents=True)
+        (tmp_path / "file1.jp2").touch()
+        (tmp_path / "notes.txt").touch()
+        (tmp_path / "nested" / "file2.JP2").touch()
+        (tmp_path / "nested" / "deeper" / "file3.jp2").touch()
+        return tmp_path
+
+    def test_process_directory_with_multiple_files(self, jp2_tree, processor, mock_box_reader_factory, monkeypatch):
+        monkeypatch.setattr(processor, "max_workers", 1)
+        processor.process_directory(str(jp2_tree))
 
         # Test that logger.info was called for each file
-        processor.logger.info.assert_any_call("Processing file: root/file1.jp2")
-        processor.logger.info.assert_any_call("Processing file: root/file2.jp2")
-        assert mock_box_reader_factory.get_reader.call_count == 2
-        assert mock_box_reader_factory.get_reader.return_value.read_jp2_file.call_count == 2
-
-    @patch("jp2_remediator.processor.os.path.exists", return_value=True)
-    @patch("jp2_remediator.processor.boto3.client", autospec=True)
-    def test_process_s3_file_with_output_key(
-        self, mock_boto3_client, mock_os_path_exists, processor, mock_box_reader_factory
-    ):
+        processor.logger.info.assert_any_call(f"Processing file: {jp2_tree / 'file1.jp2'}")
+        processor.logger.info.assert_any_call(f"Processing file: {jp2_tree / 'nested' / 'file2.JP2'}")
+        processor.logger.info.assert_any_call(f"Processing file: {jp2_tree / 'nested' / 'deeper' / 'file3.jp2'}")
+        assert mock_box_reader_factory.get_reader.call_count == 3
+        assert mock_box_reader_factory.get_reader.return_value.read_jp2_file.call_count == 3
+
+    def test_process_directory_with_process_pool(self, jp2_tree, processor, mock_box_reader_factory, monkeypatch):
+        mock_executor_class = MagicMock()
+        monkeypatch.setattr(_proc_mod, "ProcessPoolExecutor", mock_executor_class)
+
+        def start_executor(**kwargs):
+            # Run the worker initializer in-process, as a single worker would
+            kwargs["initializer"](*kwargs["initargs"])
+            return mock_executor_class.return_value
+        mock_executor_class.side_effect = start_executor
+        mock_executor = mock_executor_class.return_value.__enter__.return_value
+        mock_executor.map.side_effect = lambda fn, paths, chunksize: [fn(path) for path in paths]
+
+        results = processor.process_directory(str(jp2_tree))
+
+        assert mock_executor_class.call_args.kwargs["max_workers"] is None
+        assert mock_executor_class.call_args.kwargs["mp_context"].get_start_method() in ("forkserver", "spawn")
+        processor.logger.info.assert_any_call(f"Processing file: {jp2_tree / 'file1.jp2'}")
+        processor.logger.info.assert_any_call(f"Processing file: {jp2_tree / 'nested' / 'file2.JP2'}")
+        # The worker creates one reader and resets it for every further file
+        mock_box_reader_factory.get_reader.assert_called_once()
+        mock_reader = mock_box_reader_factory.get_reader.return_value
+        assert mock_reader.reset.call_count == 2
+        assert mock_reader.read_jp2_file.call_count == 3
+        assert len(results) == 3
+
+    @pytest.mark.parametrize("start_methods, expected", [
+        (["fork", "spawn", "forkserver"], "forkserver"),
+        (["spawn"], "spawn"),
+    ])
+    def test_worker_context(self, start_methods, expected, monkeypatch):
+        monkeypatch.setattr(_proc_mod.multiprocessing, "get_all_start_methods", lambda: start_methods)
+
+        assert _proc_mod._worker_context().get_start_method() == expected
+
+    def test_process_directory_with_real_process_pool(self, jp2_tree):
         """
-        When the modified file DOES exist, we expect:
-        1) The logger to show 'Downloading file:' and 'Uploading modified file:'
-        2) The local file path to contain a wildcard segment (file_modified_).
-        3) The upload_file call to use the correct output_bucket/output_key.
+        Runs the workers in a real process pool, so the factory, _init_worker
+        and _process_one have to pickle and run in another process.
         """
-        mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
-
-        input_bucket = "test-bucket"
-        input_key = "test-folder/file.jp2"
-        output_bucket = "output-bucket"
-        output_key = "output-folder/file_modified.jp2"
-
-        # Simulate successful S3 calls
-        mock_s3_client.download_file.return_value = None
-        mock_s3_client.upload_file.return_value = None
-
-        # Mock jp2_result
-        mock_result = Jp2Result(input_key)
-        mock_result.is_empty = False
-        mock_result.is_valid = True
-        mock_result.set_modified_file_path("/some-tmp/file_modified.jp2")
-
-        # # Force skip_remediation to remain False so upload is not skipped
-        mock_reader = MagicMock()
-        mock_reader.curv_trc_gamma_n = 1
-        mock_reader.read_jp2_file.return_value = mock_result
-        mock_box_reader_factory.get_reader.return_value = mock_reader
-
-        processor.process_s3_file(input_bucket, input_key, output_bucket, output_key)
-        print("kim here")
-        print("upload_file call_args_list:", mock_s3_client.upload_file.call_args_list)
-
-        # 1. Check upload_file with a wildcard in local path
-        upload_calls = [
-            call
-            for call in mock_s3_client.upload_file.call_args_list
-            if "/some-tmp/file_modified.jp2" in call.args[0]       # local path wildcard
-            and call.args[1] == output_bucket
-            and call.args[2] == output_key
-        ]
-        assert len(upload_calls) == 1, "Expected exactly one upload call with wildcard local path."
-
-        # 2. Verify logger calls
-        all_logger_msgs = [call.args[0] for call in processor.logger.info.mock_calls]
-        assert any("Downloading file: test-folder/file.jp2 from bucket: test-bucket"
-                   in msg for msg in all_logger_msgs), \
-            "Expected 'Downloading file:' log not found."
-        assert any("Uploading modified file to bucket: output-bucket, key: output-folder/file_modified.jp2"
-                   in msg for msg in all_logger_msgs), \
-            "Expected 'Uploading modified file:' log not found."
-
-    @patch("jp2_remediator.processor.os.path.exists", return_value=False)
-    @patch("jp2_remediator.processor.boto3.client", autospec=True)
-    def test_process_s3_file_file_does_not_exist(
-        self, mock_boto3_client, mock_os_path_exists, processor, mock_box_reader_factory
+        shutil.copy(os.path.join(paths.dir_unit_resources, "sample.jp2"), jp2_tree / "nested" / "sample.jp2")
+        processor = Processor(BoxReaderFactory(validate=False), max_workers=2)
+
+        results = processor.process_directory(str(jp2_tree))
+
+        result_codes = {os.path.relpath(result.path, jp2_tree): result.result_code() for result in results}
+        assert result_codes == {
+            "file1.jp2": 1,
+            os.path.join("nested", "file2.JP2"): 1,
+            os.path.join("nested", "deeper", "file3.jp2"): 1,
+            # sample.jp2 has curv_trc_gamma_n == 2, remediation is skipped
+            os.path.join("nested", "sample.jp2"): 3,
+        }
+
+    def test_iter_jp2_paths(self, jp2_tree, processor):
+        paths = set(processor._iter_jp2_paths(str(jp2_tree)))
+
+        assert paths == {
+            str(jp2_tree / "file1.jp2"),
+            str(jp2_tree / "nested" / "file2.JP2"),
+            str(jp2_tree / "nested" / "deeper" / "file3.jp2"),
+        }
+
+    def test_iter_jp2_paths_missing_directory(self, tmp_path, processor):
+        missing = tmp_path / "missing"
+
+        assert list(processor._iter_jp2_paths(str(missing))) == []
+        processor.logger.error.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "os_exists, skip_rem, output_key, expect_upload, expect_log, expect_remove",
+        [
+            (True, False, "output-folder/file_modified.jp2", True,
+             "Uploading modified file to bucket: output-bucket, key: output-folder/file_modified.jp2", True),
+            (False, False, "output-folder/file_modified.jp2", False,
+             "File /some-tmp/file_modified.jp2 not created.", False),
+            (True, False, None, True,
+             "Uploading modified file to bucket: output-bucket, key: test-folder/file_modified_", True),
+            (True, True, "some-output-file.jp2", False,
+             "Skipping remediation and upload for ", False),
+        ],
+        ids=["with_output_key", "file_does_not_exist", "no_output_key", "skip_remediation"],
+    )
+    def test_process_s3_file_on_disk(
+        self, os_exists, skip_rem, output_key, expect_upload, expect_log, expect_remove,
+        fake_boto3, processor, mock_box_reader_factory, monkeypatch
     ):
         """
-        When the modified file does NOT exist, we expect:
-        1) No upload to S3 (upload_file not called).
-        2) A log message stating the file does not exist, skipping upload.
+        Downloads to a temporary directory, then uploads the modified file only
+        when it was written and remediation was not skipped. The temporary
+        modified file is deleted after a successful upload.
         """
-        mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
+        mock_remove = MagicMock()
+        monkeypatch.setattr(_proc_mod.os, "remove", mock_remove)
+        monkeypatch.setattr(_proc_mod.os.path, "exists", lambda path: os_exists)
+        monkeypatch.setattr(_proc_mod.os.path, "getsize", lambda path: 100 * 1024 * 1024)
+        mock_s3_client = fake_boto3.client.return_value
 
-        input_bucket = "test-bucket"
         input_key = "test-folder/file.jp2"
-        output_bucket = "output-bucket"
-        output_key = "output-folder/file_modified.jp2"
-
-        mock_s3_client.download_file.return_value = None
-
-        # Mock jp2_result
         mock_result = Jp2Result(input_key)
+        mock_result.set_validity(True)
+        mock_result.set_skip_remediation(2 if skip_rem else 1)
         mock_result.set_modified_file_path("/some-tmp/file_modified.jp2")
-        mock_result.is_empty = False
-
-        mock_reader = MagicMock()
-        mock_reader.curv_trc_gamma_n = 1  # Mock that skip_remediation is False, not testing this here
-        mock_reader.read_jp2_file.return_value = mock_result
-        mock_box_reader_factory.get_reader.return_value = mock_reader
+        mock_box_reader_factory.get_reader.return_value.read_jp2_file.return_value = mock_result
+
+        result = processor.process_s3_file(
+            "test-bucket", input_key, "output-bucket", output_key, use_memory=False
+        )
+
+        assert result is mock_result
+        assert mock_s3_client.download_file.call_args.kwargs["Config"] is TRANSFER_CONFIG
+        if expect_upload:
+            mock_s3_client.upload_file.assert_called_once()
+            upload_call = mock_s3_client.upload_file.call_args
+            assert upload_call.args[:2] == ("/some-tmp/file_modified.jp2", "output-bucket")
+            assert upload_call.kwargs["Config"] is TRANSFER_CONFIG
+            assert result.result_code() == 4
+        else:
+            mock_s3_client.upload_file.assert_not_called()
+        assert mock_remove.called is expect_remove
+
+        log_blob = "\n".join(call.args[0] for call in processor.logger.info.mock_calls)
+        assert "Downloading file: test-folder/file.jp2 from bucket: test-bucket" in log_blob
+        assert expect_log in log_blob
+        if expect_remove:
+            processor.logger.debug.assert_any_call("Deleted temporary file: /some-tmp/file_modified.jp2")
 
-        processor.process_s3_file(input_bucket, input_key, output_bucket, output_key)
-
-        mock_s3_client.upload_file.assert_not_called()
-
-        all_logger_msgs = [call.args[0] for call in processor.logger.info.mock_calls]
-        assert any("not created" in msg for msg in all_logger_msgs), \
-            "Expected 'not created' log message not found."
-
-    @patch("jp2_remediator.processor.boto3.client", autospec=True)
-    def test_process_s3_file_skip_remediation(
-        self, mock_boto3_client, processor, mock_box_reader_factory
-    ):
+    @pytest.fixture
+    def stub_in_memory_s3(self, fake_boto3, mock_box_reader_factory):
         """
-        Covers lines where skip_remediation is True -> log + return (no upload).
+        Returns a function that sets up the in-memory path: get_object returns
+        b"original", the preflight check decides nothing, and remediate_jp2
+        returns a valid result with curv_trc_gamma_n and new_file_contents.
+        The function returns the mock S3 client.
         """
-        mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
-
-        input_bucket = "test-bucket"
-        input_key = "test-folder/skip_rem.jp2"
-        output_bucket = "output-bucket"
-
-        # Ensure the downloaded file "exists", so we skip for skip_remediation, not missing file
-        with patch("jp2_remediator.processor.os.path.exists", return_value=True):
-            mock_s3_client.download_file.return_value = None
-
-            # This time skip_remediation is True
-            mock_reader = MagicMock()
-            mock_reader.skip_remediation = True
-            mock_box_reader_factory.get_reader.return_value = mock_reader
+        def stub(curv_trc_gamma_n, new_file_contents):
+            mock_s3_client = fake_boto3.client.return_value
+            mock_s3_client.get_object.return_value = {"Body": MagicMock(read=MagicMock(return_value=b"original"))}
+
+            mock_result = Jp2Result("test-folder/file.jp2")
+            mock_result.set_validity(True)
+            mock_result.set_skip_remediation(curv_trc_gamma_n)
+            mock_reader = mock_box_reader_factory.get_in_memory_reader.return_value
+            mock_reader.curv_trc_gamma_n = None  # Not decided by the preflight check
+            mock_reader.remediate_jp2.return_value = (mock_result, new_file_contents)
+            return mock_s3_client
+        return stub
+
+    def test_process_s3_file_in_memory(self, stub_in_memory_s3, processor, mock_box_reader_factory):
+        """
+        The in-memory path streams the object into an InMemoryBoxReader and
+        uploads the modified bytes with put_object, without touching /tmp.
+        """
+        mock_s3_client = stub_in_memory_s3(1, bytearray(b"modified"))
+
+        result = processor.process_s3_file("test-bucket", "test-folder/file.jp2", "output-bucket", "output.jp2")
+
+        mock_s3_client.get_object.assert_any_call(
+            Bucket="test-bucket", Key="test-folder/file.jp2", Range="bytes=0-65535"
+        )
+        mock_s3_client.get_object.assert_called_with(Bucket="test-bucket", Key="test-folder/file.jp2")
+        mock_box_reader_factory.get_in_memory_reader.assert_called_with(b"original", "test-folder/file.jp2")
+        mock_s3_client.put_object.assert_called_once_with(
+            Bucket="output-bucket", Key="output.jp2", Body=bytearray(b"modified")
+        )
+        mock_s3_client.download_file.assert_not_called()
+        assert result.get_modified_file_path() == "output.jp2"
+        assert result.result_code() == 4
 
-            processor.process_s3_file(input_bucket, input_key, output_bucket, output_key="some-output-file.jp2")
+    @pytest.mark.parametrize("gamma_n, expected_log", [
+        (1, "No modifications needed. No file uploaded: test-folder/file.jp2"),
+        (2, "Skipping remediation and upload for "),
+    ])
+    def test_process_s3_file_in_memory_no_upload(self, stub_in_memory_s3, gamma_n, expected_log, processor):
+        mock_s3_client = stub_in_memory_s3(gamma_n, b"original")
 
-        # Because skip_remediation is True, we never call upload_file
-        mock_s3_client.upload_file.assert_not_called()
+        result = processor.process_s3_file("test-bucket", "test-folder/file.jp2", "output-bucket", "output.jp2")
 
-        # Also confirm we logged the skip message
-        all_logger_msgs = [call.args[0] for call in processor.logger.info.mock_calls]
-        assert any("Skipping remediation and upload for " in msg
-                   for msg in all_logger_msgs), "Expected skip_remediation log message."
+        mock_s3_client.put_object.assert_not_called()
+        assert result.get_modified_file_path() is None
+        log_blob = "\n".join(call.args[0] for call in processor.logger.info.mock_calls)
+        assert expected_log in log_blob
 
-    @patch("jp2_remediator.processor.os.path.exists", return_value=True)
-    @patch("jp2_remediator.processor.os.remove", autospec=True)
-    @patch("jp2_remediator.processor.boto3.client", autospec=True)
-    def test_process_s3_file_file_removed_successfully(
-        self, mock_boto3_client, mock_remove, mock_os_path_exists, processor, mock_box_reader_factory
+    def test_process_s3_file_preflight_skip(self, fake_boto3, processor, mock_box_reader_factory):
+        """
+        When the header range already shows curv_trc_gamma_n != 1, the full
+        object is never downloaded or remediated.
+        """
+        mock_s3_client = fake_boto3.client.return_value
+        mock_s3_client.get_object.return_value = {"Body": MagicMock(read=MagicMock(return_value=b"header"))}
+        mock_reader = mock_box_reader_factory.get_in_memory_reader.return_value
+        mock_reader.check_boxes.return_value = 50
+        mock_reader.curv_trc_gamma_n = 2
+
+        result = processor.process_s3_file("test-bucket", "test-folder/file.jp2", "output-bucket", "output.jp2")
+
+        mock_s3_client.get_object.assert_called_once_with(
+            Bucket="test-bucket", Key="test-folder/file.jp2", Range="bytes=0-65535"
+        )
+        mock_reader.process_all_trc_tags.assert_called_once_with(50)
+        mock_reader.remediate_jp2.assert_not_called()
+        mock_s3_client.put_object.assert_not_called()
+        assert result.is_valid is None
+        assert result.result_code() == 3
+
+    def test_process_s3_file_empty_object(self, fake_boto3, processor, mock_box_reader_factory):
+        """
+        S3 answers a ranged GET on an empty object with InvalidRange, the
+        file is then downloaded in full and reported as empty.
+        """
+        mock_s3_client = fake_boto3.client.return_value
+        mock_s3_client.get_object.side_effect = [
+            ClientError({"Error": {"Code": "InvalidRange"}}, "GetObject"),
+            {"Body": MagicMock(read=MagicMock(return_value=b""))},
+        ]
+        mock_reader = mock_box_reader_factory.get_in_memory_reader.return_value
+        mock_reader.remediate_jp2.return_value = (Jp2Result("test-folder/empty.jp2").empty_result(), b"")
+
+        result = processor.process_s3_file("test-bucket", "test-folder/empty.jp2", "output-bucket", "output.jp2")
+
+        mock_s3_client.get_object.assert_called_with(Bucket="test-bucket", Key="test-folder/empty.jp2")
+        mock_box_reader_factory.get_in_memory_reader.assert_called_once_with(b"", "test-folder/empty.jp2")
+        mock_s3_client.put_object.assert_not_called()
+        assert result.result_code() == 1
+
+    def test_preflight_skip_other_client_error(self, fake_boto3, processor):
+        mock_s3_client = fake_boto3.client.return_value
+        mock_s3_client.get_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+
+        with pytest.raises(ClientError):
+            processor.preflight_skip("test-bucket", "test-folder/missing.jp2")
+
+    def test_process_s3_file_default_output_key(self, stub_in_memory_s3, processor):
+        mock_s3_client = stub_in_memory_s3(1, bytearray(b"modified"))
+
+        processor.process_s3_file("test-bucket", "test-folder/file.jp2", "output-bucket", None)
+
+        output_key = mock_s3_client.put_object.call_args.kwargs["Key"]
+        assert output_key.startswith("test-folder/file_modified_file_")
+        assert output_key.endswith(".jp2")
+
+    def test_process_s3_batch(self, fake_boto3, processor):
+        mock_session_class = fake_boto3.session.Session
+        mock_s3_client = mock_session_class.return_value.client.return_value
+        keys = ["a.jp2", "b.jp2", "broken.jp2"]
+
+        def process_s3_file(input_bucket, key, output_bucket, output_key, s3_client, timestamp):
+            if key == "broken.jp2":
+                raise RuntimeError("boom")
+            return Jp2Result(key)
+
+        with patch.object(processor, "process_s3_file", side_effect=process_s3_file) as mock_process:
+            results = processor.process_s3_batch("test-bucket", keys, "output-bucket", max_concurrency=4)
+
+        # One shared session and client are used for every key
+        mock_session_class.assert_called_once()
+        assert mock_session_class.return_value.client.call_args.kwargs["config"].max_pool_connections == 4
+        assert mock_process.call_count == 3
+        for call in mock_process.call_args_list:
+            assert call.kwargs["s3_client"] is mock_s3_client
+        # The timestamp for output keys is computed once per batch
+        assert len({call.kwargs["timestamp"] for call in mock_process.call_args_list}) == 1
+        assert set(results) == {"a.jp2", "b.jp2"}
+        processor.logger.error.assert_called_once_with("Error processing broken.jp2 from bucket test-bucket: boom")
+
+    @pytest.mark.parametrize("input_key, expected", [
+        ("test-folder/file.jp2", "test-folder/file_modified_file_20240101.jp2"),
+        ("file.JP2", "file_modified_file_20240101.jp2"),
+        ("folder.jp2/file.jp2.jp2", "folder.jp2/file.jp2_modified_file_20240101.jp2"),
+    ])
+    def test_modified_output_key(self, input_key, expected):
+        assert _modified_output_key(input_key, "20240101") == expected
+
+    def test_process_s3_file_on_disk_removes_download(
+        self, fake_boto3, tmp_path, processor, mock_box_reader_factory, monkeypatch
     ):
         """
-        Covers the line where 'Deleted temporary file:' is logged after a successful os.remove().
+        The downloaded file and temporary directory are deleted even when
+        remediation is skipped and nothing is uploaded.
         """
-        mock_s3_client = MagicMock()
-        mock_boto3_client.return_value = mock_s3_client
-
-        input_bucket = "test-bucket"
-        input_key = "test-folder/file.jp2"
-        output_bucket = "output-bucket"
-        output_key = "output-folder/file_modified.jp2"
-
-        # Simulate successful S3 calls
-        mock_s3_client.download_file.return_value = None
-        mock_s3_client.upload_file.return_value = None
+        tmp_dir = tmp_path / "download"
+        tmp_dir.mkdir()
+        monkeypatch.setattr(_proc_mod.tempfile, "mkdtemp", lambda: str(tmp_dir))
+        mock_s3_client = fake_boto3.client.return_value
+        mock_s3_client.download_file.side_effect = lambda bucket, key, path, Config: open(path, "wb").close()
 
-        # Ensure skip_remediation is False so we don't exit early
-        mock_reader = MagicMock()
-        mock_reader.curv_trc_gamma_n = 1
+        mock_result = Jp2Result("test-folder/file.jp2")
+        mock_result.set_skip_remediation(2)
+        mock_box_reader_factory.get_reader.return_value.read_jp2_file.return_value = mock_result
 
-        mock_result = Jp2Result(input_key)
-        mock_result.set_modified_file_path("/some-tmp/file_modified.jp2")
-        mock_result.is_empty = False
-        mock_result.is_valid = True
-        mock_reader.read_jp2_file.return_value = mock_result
-        mock_box_reader_factory.get_reader.return_value = mock_reader
-
-        # Run the method
-        result = processor.process_s3_file(input_bucket, input_key, output_bucket, output_key)
-        assert result is not None
-        assert result.is_valid is True
-        assert result.result_code() == 4
+        processor.process_s3_file(
+            "test-bucket", "test-folder/file.jp2", "output-bucket", "output.jp2", use_memory=False
+        )
 
-        # Confirm remove was called
-        mock_remove.assert_called_once()
-
-        # Confirm we logged the 'Deleted temporary file:' message
-        all_logger_msgs = [call.args[0] for call in processor.logger.debug.mock_calls]
-        assert any("Deleted temporary file:" in msg for msg in all_logger_msgs), \
-            "Expected 'Deleted temporary file:' log message not found."
+        mock_box_reader_factory.get_reader.assert_called_once_with(str(tmp_dir / "file.jp2"))
+        mock_s3_client.upload_file.assert_not_called()
+        assert not tmp_dir.exists()
+
+    @pytest.mark.parametrize("size, expected", [
+        (1024, SMALL_TRANSFER_CONFIG),
+        (8 * 1024 * 1024 - 1, SMALL_TRANSFER_CONFIG),
+        (8 * 1024 * 1024, MEDIUM_TRANSFER_CONFIG),
+        (30 * 1024 * 1024, MEDIUM_TRANSFER_CONFIG),
+        (100 * 1024 * 1024, TRANSFER_CONFIG),
+    ])
+    def test_transfer_config(self, size, expected):
+        assert _transfer_config(size) is expected